@@ -1,12 +1,29 @@
+from unittest import skipUnless
+from unittest.mock import call, patch
+
+from django.db import connection, transaction
 from django.test import TestCase
 from django.utils.translation import override
 
 from translations.context import Context
+from translations.models import Translation
 
-from sample.models import Continent
+from sample.models import Continent, Country
 from sample.utils import create_samples
 
 
+class UpperNameDescriptor:
+    """A data descriptor which upper-cases the names it is set to."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        return instance.__dict__['name']
+
+    def __set__(self, instance, value):
+        instance.__dict__['name'] = value.upper()
+
+
 class ContextTest(TestCase):
     """Tests for `Context`."""
 
@@ -682,6 +699,26 @@ class ContextTest(TestCase):
             }
         )
 
+    def test_get_changed_fields_instance_cleared_field(self):
+        create_samples(
+            continent_names=['europe'],
+            langs=['de', 'tr']
+        )
+
+        europe = Continent.objects.get(code='EU')
+        with Context(europe) as context:
+            europe.name = 'Europe Name'
+            europe.denonym = ''
+
+        self.assertListEqual(
+            [(info[0]['field'], info[1])
+             for info in context._get_changed_fields()],
+            [
+                ('name', 'Europe Name'),
+                ('denonym', ''),
+            ]
+        )
+
     @override(language='de', deactivate=True)
     def test_create_instance_level_0_relation_no_lang(self):
         create_samples(
@@ -3553,6 +3590,74 @@ class ContextTest(TestCase):
             '`xx` is not a supported language.'
         )
 
+    def test_read_queryset_property_relation(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            langs=['de']
+        )
+
+        continents = list(Continent.objects.prefetch_related('countries'))
+        europe = [x for x in continents if x.code == 'EU'][0]
+        germany = europe.countries.all()[0]
+        asia = [x for x in continents if x.code == 'AS'][0]
+        south_korea = asia.countries.all()[0]
+
+        # a property which gives a list of objects per object
+        clist = property(lambda self: list(self.countries.all()))
+        with patch.object(Continent, 'clist', clist, create=True):
+            with Context(continents, 'clist') as context:
+                context.read('de')
+
+        self.assertEqual(europe.name, 'Europa')
+        self.assertEqual(germany.name, 'Deutschland')
+        self.assertEqual(asia.name, 'Asien')
+        self.assertEqual(south_korea.name, 'Südkorea')
+
+    def test_read_queryset_mixed_models_property_relation(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            langs=['de']
+        )
+
+        countries = list(Country.objects.order_by('code'))
+        germany = [x for x in countries if x.code == 'DE'][0]
+        south_korea = [x for x in countries if x.code == 'KR'][0]
+        asia = south_korea.continent
+
+        # a property which gives the objects of different models
+        feature = property(
+            lambda self: self if self.code == 'DE' else asia
+        )
+        with patch.object(Country, 'feature', feature, create=True):
+            with Context(countries, 'feature') as context:
+                context.read('de')
+
+        self.assertEqual(germany.name, 'Deutschland')
+        self.assertEqual(south_korea.name, 'Südkorea')
+        self.assertEqual(asia.name, 'Asien')
+
+    def test_read_instance_descriptor_field(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de']
+        )
+
+        europe = Continent.objects.get(code='EU')
+        with patch.object(Continent, 'name', UpperNameDescriptor()):
+            with Context(europe) as context:
+                context.read('de')
+
+            self.assertEqual(europe.name, 'EUROPA')
+
+        self.assertEqual(europe.denonym, 'Europäisch')
+
     @override(language='de', deactivate=True)
     def test_update_instance_level_0_relation_no_lang(self):
         create_samples(
@@ -5477,6 +5582,134 @@ class ContextTest(TestCase):
             '`xx` is not a supported language.'
         )
 
+    def test_update_instance_cleared_field(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        europe = Continent.objects.get(code='EU')
+        with Context(europe) as context:
+            europe.denonym = ''
+            context.update('de')
+
+        europe = Continent.objects.get(code='EU')
+        with Context(europe) as context:
+            context.read('de')
+
+        self.assertEqual(europe.name, 'Europa')
+        self.assertEqual(europe.denonym, 'European')
+
+    def test_update_instance_queries(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        europe = Continent.objects.get(code='EU')
+        with Context(europe) as context:
+            europe.name = 'Europe Name'
+            europe.denonym = 'Europe Denonym'
+            # the test transaction is reused without savepoints
+            with self.assertNumQueries(2):
+                context.update('de')
+
+    def test_update_instance_write_database(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        europe = Continent.objects.get(code='EU')
+        with Context(europe) as context:
+            europe.name = 'Europe Name'
+            with patch(
+                'translations.utils.router.db_for_write',
+                return_value='default',
+            ) as db_for_write, patch(
+                'translations.context.transaction.atomic',
+                wraps=transaction.atomic,
+            ) as atomic:
+                context.update('de')
+
+        db_for_write.assert_any_call(Translation)
+        # the outermost unit of work is the one of the context
+        self.assertEqual(
+            atomic.call_args_list[0],
+            call(using='default', savepoint=False)
+        )
+
+    # more translations than the 199 (999 // 5) of a SQLite batch
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite limits')
+    def test_create_update_queryset_many_batches(self):
+        letters = 'ABCDEFGHIJKL'
+        codes = [x + y for x in letters for y in letters[:10]]
+
+        Continent.objects.bulk_create([
+            Continent(
+                code=code,
+                name='Continent {}'.format(code),
+                denonym='Continental {}'.format(code),
+            ) for code in codes
+        ])
+
+        continents = Continent.objects.all()
+        with Context(continents) as context:
+            for continent in continents:
+                continent.name = 'Kontinent {}'.format(continent.code)
+                continent.denonym = 'Kontinental {}'.format(continent.code)
+            # two batches of inserts
+            with self.assertNumQueries(2):
+                context.create('de')
+
+        self.assertEqual(
+            Translation.objects.filter(language='de').count(),
+            240
+        )
+
+        continents = Continent.objects.all()
+        with Context(continents) as context:
+            for continent in continents:
+                continent.name = 'Erdteil {}'.format(continent.code)
+                continent.denonym = 'Erdteilig {}'.format(continent.code)
+            # one batch of deletes and two batches of inserts
+            with self.assertNumQueries(3):
+                context.update('de')
+
+        self.assertEqual(
+            Translation.objects.filter(language='de').count(),
+            240
+        )
+
+        continents = Continent.objects.all()
+        with Context(continents) as context:
+            context.read('de')
+
+        self.assertEqual(
+            set(continent.name for continent in continents),
+            set('Erdteil {}'.format(code) for code in codes)
+        )
+        self.assertEqual(
+            set(continent.denonym for continent in continents),
+            set('Erdteilig {}'.format(code) for code in codes)
+        )
+
+    def test_update_queryset_no_changes_queries(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = Continent.objects.all()
+
+        with Context(continents) as context:
+            with self.assertNumQueries(0):
+                context.update('de')
+
     @override(language='de', deactivate=True)
     def test_delete_instance_level_0_relation_no_lang(self):
         create_samples(
@@ -6601,6 +6834,44 @@ class ContextTest(TestCase):
             '`xx` is not a supported language.'
         )
 
+    def test_delete_empty_queryset_queries(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = Continent.objects.none()
+
+        with Context(continents) as context:
+            with self.assertNumQueries(0):
+                context.delete('de')
+
+    def test_delete_instance_write_database(self):
+        create_samples(
+            continent_names=['europe'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        europe = Continent.objects.get(code='EU')
+        with Context(europe) as context:
+            with patch(
+                'translations.utils.router.db_for_write',
+                return_value='default',
+            ) as db_for_write, patch(
+                'translations.context.transaction.atomic',
+                wraps=transaction.atomic,
+            ) as atomic:
+                context.delete('de')
+
+        db_for_write.assert_any_call(Translation)
+        # the outermost unit of work is the one of the context
+        self.assertEqual(
+            atomic.call_args_list[0],
+            call(using='default', savepoint=False)
+        )
+
     @override(language='de', deactivate=True)
     def test_reset_instance_level_0_relation_no_lang(self):
         create_samples(
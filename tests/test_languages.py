@@ -3,7 +3,7 @@ from django.utils.translation import override
 
 from translations.languages import _get_supported_language, \
     _get_default_language, _get_active_language, \
-    _get_all_languages, _get_all_choices, \
+    _get_all_languages, _get_all_languages_set, _get_all_choices, \
     _get_translation_languages, _get_translation_choices, \
     _get_translate_language, _get_probe_language, \
     translate, probe
@@ -125,6 +125,21 @@ class GetAllLanguagesTest(TestCase):
         )
 
 
+class GetAllLanguagesSetTest(TestCase):
+    """Tests for `_get_all_languages_set`."""
+
+    def test_get_all_languages_set(self):
+        self.assertEqual(
+            _get_all_languages_set(),
+            frozenset([
+                'en',
+                'en-gb',
+                'de',
+                'tr',
+            ])
+        )
+
+
 class GetAllChoicesTest(TestCase):
     """Tests for `_get_all_choices`."""
 
@@ -57,6 +57,8 @@ class override_tmeta(ContextDecorator):
             delattr(self.model, '_cached_translatable_fields')
         if hasattr(self.model, '_cached_translatable_fields_names'):
             delattr(self.model, '_cached_translatable_fields_names')
+        if hasattr(self.model, '_cached_translatable_fields_names_set'):
+            delattr(self.model, '_cached_translatable_fields_names_set')
 
     def __exit__(self, exc_type, exc_value, traceback):
         setattr(self.model, 'TranslatableMeta', self.old_tmeta)
@@ -65,6 +67,8 @@ class override_tmeta(ContextDecorator):
             delattr(self.model, '_cached_translatable_fields')
         if hasattr(self.model, '_cached_translatable_fields_names'):
             delattr(self.model, '_cached_translatable_fields_names')
+        if hasattr(self.model, '_cached_translatable_fields_names_set'):
+            delattr(self.model, '_cached_translatable_fields_names_set')
 
 
 class CommandTest(TestCase):
@@ -954,6 +958,32 @@ class CommandTest(TestCase):
             ) + '\n'
         )
 
+    @override_tmeta(Continent, fields=[])
+    @override_tmeta(Country, fields=[])
+    @override_tmeta(City, fields=[])
+    def test_log_obsolete_translations_content_types_queries(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            city_names=['cologne', 'seoul'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            city_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        stdout = StringIO()
+        command = Command(stdout=stdout)
+        obsolete_translations = command.get_obsolete_translations(
+            ContentType.objects.get_for_models(
+                Continent, Country, City
+            ).values()
+        )
+        command.verbosity = 1
+
+        with self.assertNumQueries(1):
+            command.log_obsolete_translations(obsolete_translations)
+
     def test_log_obsolete_translations_one_content_type_not_trans(self):
         user = User.objects.create_user('behzad')
 
@@ -247,6 +247,24 @@ class TranslatableTest(TestCase):
             ['name', 'denonym']
         )
 
+    def test_get_translatable_fields_names_set_automatic(self):
+        self.assertEqual(
+            City._get_translatable_fields_names_set(),
+            frozenset(['name', 'denonym'])
+        )
+
+    def test_get_translatable_fields_names_set_empty(self):
+        self.assertEqual(
+            Timezone._get_translatable_fields_names_set(),
+            frozenset()
+        )
+
+    def test_get_translatable_fields_names_set_explicit(self):
+        self.assertEqual(
+            Continent._get_translatable_fields_names_set(),
+            frozenset(['name', 'denonym'])
+        )
+
     def test_get_translatable_fields_choices_automatic(self):
         self.assertListEqual(
             City._get_translatable_fields_choices(),
@@ -1,14 +1,24 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
 from django.core.exceptions import FieldDoesNotExist
 from django.contrib.contenttypes.models import ContentType
 
-from translations.utils import _get_reverse_relation, _get_dissected_lookup, \
-    _get_relations_hierarchy, _get_entity_details, \
-    _get_purview, _get_translations
+from translations.utils import _get_reverse_relation, _get_lookup_parts, \
+    _get_dissected_lookup, _get_relations_hierarchy, _get_fields_getter, \
+    _get_entity_details, _get_purview, _get_batched_queries, \
+    _get_translations, _get_bulk_batch_size
+
+from translations.models import Translation
 
 from sample.models import Continent, Country, City
 from sample.utils import create_samples
 
+from tests.test_management.test_commands.test_synctranslations import \
+    override_tmeta
+
 
 class GetReverseRelationTest(TestCase):
     """Tests for `_get_reverse_relation`."""
@@ -37,6 +47,19 @@ class GetReverseRelationTest(TestCase):
             'countries__cities'
         )
 
+    def test_cached_relation(self):
+        _get_reverse_relation(Continent, 'countries__cities')
+        hits = _get_reverse_relation.cache_info().hits
+
+        self.assertEqual(
+            _get_reverse_relation(Continent, 'countries__cities'),
+            'country__continent'
+        )
+        self.assertEqual(
+            _get_reverse_relation.cache_info().hits,
+            hits + 1
+        )
+
     def test_empty_relation(self):
         with self.assertRaises(FieldDoesNotExist) as error:
             _get_reverse_relation(Continent, '')
@@ -68,6 +91,38 @@ class GetReverseRelationTest(TestCase):
 class GetDissectedLookupTest(TestCase):
     """Tests for `_get_dissected_lookup`."""
 
+    def test_cached_lookup(self):
+        _get_dissected_lookup(Continent, 'countries__name__icontains')
+        hits = _get_lookup_parts.cache_info().hits
+
+        self.assertEqual(
+            _get_dissected_lookup(Continent, 'countries__name__icontains'),
+            {
+                'relation': ['countries'],
+                'field': 'name',
+                'supplement': 'icontains',
+                'translatable': True,
+            }
+        )
+        self.assertEqual(
+            _get_lookup_parts.cache_info().hits,
+            hits + 1
+        )
+
+    def test_translatable_follows_tmeta(self):
+        self.assertTrue(
+            _get_dissected_lookup(Continent, 'name')['translatable']
+        )
+
+        with override_tmeta(Continent, fields=[]):
+            self.assertFalse(
+                _get_dissected_lookup(Continent, 'name')['translatable']
+            )
+
+        self.assertTrue(
+            _get_dissected_lookup(Continent, 'name')['translatable']
+        )
+
     def test_nrel_yfield_ntranslatable_nlookup(self):
         self.assertDictEqual(
             _get_dissected_lookup(Continent, 'code'),
@@ -235,6 +290,14 @@ class GetRelationsHierarchyTest(TestCase):
             {}
         )
 
+    def test_cached_relations(self):
+        hierarchy = _get_relations_hierarchy('countries', 'countries__cities')
+
+        self.assertIs(
+            _get_relations_hierarchy('countries', 'countries__cities'),
+            hierarchy
+        )
+
     def test_one_level_1_relation(self):
         self.assertEqual(
             _get_relations_hierarchy(
@@ -487,6 +550,40 @@ class GetRelationsHierarchyTest(TestCase):
         )
 
 
+class GetFieldsGetterTest(TestCase):
+    """Tests for `_get_fields_getter`."""
+
+    def test_no_fields(self):
+        create_samples(continent_names=['europe'])
+
+        europe = Continent.objects.get(code='EU')
+
+        self.assertEqual(
+            _get_fields_getter([])(europe),
+            ()
+        )
+
+    def test_one_field(self):
+        create_samples(continent_names=['europe'])
+
+        europe = Continent.objects.get(code='EU')
+
+        self.assertEqual(
+            _get_fields_getter(['name'])(europe),
+            ('Europe',)
+        )
+
+    def test_many_fields(self):
+        create_samples(continent_names=['europe'])
+
+        europe = Continent.objects.get(code='EU')
+
+        self.assertEqual(
+            _get_fields_getter(['name', 'denonym'])(europe),
+            ('Europe', 'European')
+        )
+
+
 class GetEntityDetailsTest(TestCase):
     """Tests for `_get_entity_details`."""
 
@@ -510,6 +607,18 @@ class GetEntityDetailsTest(TestCase):
             (True, Continent)
         )
 
+    def test_queryset_single_query(self):
+        create_samples(continent_names=['europe', 'asia'])
+
+        continents = Continent.objects.all()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                _get_entity_details(continents),
+                (True, Continent)
+            )
+            list(continents)
+
     def test_instance(self):
         create_samples(continent_names=['europe'])
 
@@ -597,7 +706,7 @@ class GetPurviewTest(TestCase):
 
         ct_continent = ContentType.objects.get_for_model(Continent)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -627,7 +736,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_country = ContentType.objects.get_for_model(Country)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -663,7 +772,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -700,7 +809,7 @@ class GetPurviewTest(TestCase):
         ct_country = ContentType.objects.get_for_model(Country)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -734,7 +843,7 @@ class GetPurviewTest(TestCase):
 
         ct_continent = ContentType.objects.get_for_model(Continent)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -770,7 +879,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_country = ContentType.objects.get_for_model(Country)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -814,7 +923,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -859,7 +968,7 @@ class GetPurviewTest(TestCase):
         ct_country = ContentType.objects.get_for_model(Country)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -879,6 +988,84 @@ class GetPurviewTest(TestCase):
             }
         )
 
+    def test_list_level_1_relation_prefetches_once(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = list(Continent.objects.all())
+
+        hierarchy = _get_relations_hierarchy('countries')
+
+        ct_continent = ContentType.objects.get_for_model(Continent)
+        ct_country = ContentType.objects.get_for_model(Country)
+
+        with self.assertNumQueries(1):
+            mapping = _get_purview(continents, hierarchy)
+
+        self.assertEqual(
+            sorted(mapping[ct_continent.id].keys()),
+            ['AS', 'EU']
+        )
+        self.assertEqual(
+            sorted(mapping[ct_country.id].keys()),
+            ['DE', 'KR']
+        )
+
+    def test_list_level_2_relation_prefetches_once_per_level(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            city_names=['cologne', 'seoul'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            city_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = list(Continent.objects.all())
+
+        hierarchy = _get_relations_hierarchy('countries__cities')
+
+        ct_city = ContentType.objects.get_for_model(City)
+
+        with self.assertNumQueries(2):
+            mapping = _get_purview(continents, hierarchy)
+
+        self.assertEqual(
+            len(mapping[ct_city.id]),
+            2
+        )
+
+    def test_list_reverse_level_1_relation_prefetches_once(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            city_names=['cologne', 'seoul'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            city_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        cities = list(City.objects.all())
+
+        hierarchy = _get_relations_hierarchy('country')
+
+        ct_country = ContentType.objects.get_for_model(Country)
+
+        with self.assertNumQueries(1):
+            mapping = _get_purview(cities, hierarchy)
+
+        self.assertEqual(
+            sorted(mapping[ct_country.id].keys()),
+            ['DE', 'KR']
+        )
+
     def test_prefetched_instance_level_0_relation(self):
         create_samples(
             continent_names=['europe'],
@@ -892,7 +1079,7 @@ class GetPurviewTest(TestCase):
 
         ct_continent = ContentType.objects.get_for_model(Continent)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -922,7 +1109,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_country = ContentType.objects.get_for_model(Country)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -958,7 +1145,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -995,7 +1182,7 @@ class GetPurviewTest(TestCase):
         ct_country = ContentType.objects.get_for_model(Country)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -1029,7 +1216,7 @@ class GetPurviewTest(TestCase):
 
         ct_continent = ContentType.objects.get_for_model(Continent)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -1065,7 +1252,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_country = ContentType.objects.get_for_model(Country)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -1109,7 +1296,7 @@ class GetPurviewTest(TestCase):
         ct_continent = ContentType.objects.get_for_model(Continent)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -1154,7 +1341,7 @@ class GetPurviewTest(TestCase):
         ct_country = ContentType.objects.get_for_model(Country)
         ct_city = ContentType.objects.get_for_model(City)
 
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
 
         self.assertDictEqual(
             mapping,
@@ -1174,6 +1361,118 @@ class GetPurviewTest(TestCase):
             }
         )
 
+    def test_iterator_level_0_relation(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            continent_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = list(Continent.objects.all())
+
+        europe = [x for x in continents if x.code == 'EU'][0]
+
+        asia = [x for x in continents if x.code == 'AS'][0]
+
+        hierarchy = _get_relations_hierarchy()
+
+        ct_continent = ContentType.objects.get_for_model(Continent)
+
+        mapping = _get_purview(iter(continents), hierarchy)
+
+        self.assertDictEqual(
+            mapping,
+            {
+                ct_continent.id: {
+                    str(europe.pk): europe,
+                    str(asia.pk): asia
+                },
+            }
+        )
+
+    def test_queryset_property_relation(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = Continent.objects.all()
+
+        europe = [x for x in continents if x.code == 'EU'][0]
+        germany = europe.countries.all()[0]
+
+        asia = [x for x in continents if x.code == 'AS'][0]
+        south_korea = asia.countries.all()[0]
+
+        hierarchy = _get_relations_hierarchy('clist')
+
+        ct_continent = ContentType.objects.get_for_model(Continent)
+        ct_country = ContentType.objects.get_for_model(Country)
+
+        # a property which gives a queryset per object
+        clist = property(lambda self: self.countries.all())
+        with patch.object(Continent, 'clist', clist, create=True):
+            mapping = _get_purview(continents, hierarchy)
+
+        self.assertDictEqual(
+            mapping,
+            {
+                ct_continent.id: {
+                    str(europe.pk): europe,
+                    str(asia.pk): asia
+                },
+                ct_country.id: {
+                    str(germany.pk): germany,
+                    str(south_korea.pk): south_korea
+                },
+            }
+        )
+
+    def test_queryset_mixed_models_property_relation(self):
+        create_samples(
+            continent_names=['europe', 'asia'],
+            country_names=['germany', 'south korea'],
+            continent_fields=['name', 'denonym'],
+            country_fields=['name', 'denonym'],
+            langs=['de', 'tr']
+        )
+
+        continents = Continent.objects.all()
+
+        europe = [x for x in continents if x.code == 'EU'][0]
+        germany = europe.countries.all()[0]
+
+        asia = [x for x in continents if x.code == 'AS'][0]
+
+        hierarchy = _get_relations_hierarchy('feature')
+
+        ct_continent = ContentType.objects.get_for_model(Continent)
+        ct_country = ContentType.objects.get_for_model(Country)
+
+        # a property which gives the objects of different models
+        feature = property(
+            lambda self: self.countries.all()[0]
+            if self.code == 'EU' else self
+        )
+        with patch.object(Continent, 'feature', feature, create=True):
+            mapping = _get_purview(continents, hierarchy)
+
+        self.assertDictEqual(
+            mapping,
+            {
+                ct_continent.id: {
+                    str(europe.pk): europe,
+                    str(asia.pk): asia
+                },
+                ct_country.id: {
+                    str(germany.pk): germany,
+                },
+            }
+        )
+
     def test_invalid_instance(self):
         class Person:
             def __init__(self, name):
@@ -1221,6 +1520,80 @@ class GetPurviewTest(TestCase):
         )
 
 
+class GetBatchedQueriesTest(TestCase):
+    """Tests for `_get_batched_queries`."""
+
+    def test_no_groups(self):
+        self.assertListEqual(
+            _get_batched_queries([]),
+            []
+        )
+
+    def test_write(self):
+        ct_continent = ContentType.objects.get_for_model(Continent)
+
+        with patch(
+            'translations.utils.router.db_for_read',
+            return_value='default',
+        ) as db_for_read, patch(
+            'translations.utils.router.db_for_write',
+            return_value='default',
+        ) as db_for_write:
+            _get_batched_queries(
+                [({'content_type_id': ct_continent.id}, ['EU'])],
+                write=True,
+            )
+
+        db_for_write.assert_called_once_with(Translation)
+        db_for_read.assert_not_called()
+
+    def test_small_groups(self):
+        ct_continent = ContentType.objects.get_for_model(Continent)
+        ct_country = ContentType.objects.get_for_model(Country)
+
+        queries = _get_batched_queries([
+            ({'content_type_id': ct_continent.id}, ['EU', 'AS']),
+            ({'content_type_id': ct_country.id}, ['DE']),
+        ])
+
+        self.assertEqual(len(queries), 1)
+
+    def test_big_groups(self):
+        ct_continent = ContentType.objects.get_for_model(Continent)
+        ct_country = ContentType.objects.get_for_model(Country)
+
+        object_ids = [str(i) for i in range(1500)]
+
+        Translation.objects.bulk_create(
+            [
+                Translation(
+                    content_type=ct,
+                    object_id=object_id,
+                    field='name',
+                    language='de',
+                    text='text',
+                )
+                for ct in (ct_continent, ct_country)
+                for object_id in object_ids
+            ],
+            batch_size=100,
+        )
+
+        queries = _get_batched_queries([
+            ({'content_type_id': ct_continent.id}, object_ids),
+            ({'content_type_id': ct_country.id}, object_ids),
+        ])
+
+        self.assertGreater(len(queries), 1)
+        self.assertEqual(
+            sum(
+                _get_translations(query, 'de').count()
+                for query in queries
+            ),
+            3000
+        )
+
+
 class GetTranslationsTest(TestCase):
     """Tests for `_get_translations`."""
 
@@ -1237,7 +1610,11 @@ class GetTranslationsTest(TestCase):
 
         europe = Continent.objects.get(code='EU')
         hierarchy = _get_relations_hierarchy()
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1262,7 +1639,11 @@ class GetTranslationsTest(TestCase):
 
         europe = Continent.objects.get(code='EU')
         hierarchy = _get_relations_hierarchy(*lvl_1)
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1289,7 +1670,11 @@ class GetTranslationsTest(TestCase):
 
         europe = Continent.objects.get(code='EU')
         hierarchy = _get_relations_hierarchy(*lvl_2)
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1316,7 +1701,11 @@ class GetTranslationsTest(TestCase):
 
         europe = Continent.objects.get(code='EU')
         hierarchy = _get_relations_hierarchy(*lvl_1_2)
-        mapping, query = _get_purview(europe, hierarchy)
+        mapping = _get_purview(europe, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1343,7 +1732,11 @@ class GetTranslationsTest(TestCase):
 
         continents = Continent.objects.all()
         hierarchy = _get_relations_hierarchy()
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1370,7 +1763,11 @@ class GetTranslationsTest(TestCase):
 
         continents = Continent.objects.all()
         hierarchy = _get_relations_hierarchy(*lvl_1)
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1401,7 +1798,11 @@ class GetTranslationsTest(TestCase):
 
         continents = Continent.objects.all()
         hierarchy = _get_relations_hierarchy(*lvl_2)
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1432,7 +1833,11 @@ class GetTranslationsTest(TestCase):
 
         continents = Continent.objects.all()
         hierarchy = _get_relations_hierarchy(*lvl_1_2)
-        mapping, query = _get_purview(continents, hierarchy)
+        mapping = _get_purview(continents, hierarchy)
+        query, = _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in mapping.items()
+        ])
 
         self.assertQuerysetEqual(
             _get_translations(query, 'de').order_by('id'),
@@ -1451,3 +1856,32 @@ class GetTranslationsTest(TestCase):
                 '<Translation: Seouler: Seüler>',
             ]
         )
+
+
+class GetBulkBatchSizeTest(TestCase):
+    """Tests for `_get_bulk_batch_size`."""
+
+    # 999 query parameters // 5 non-auto columns of a `Translation`
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite limits')
+    def test_no_objects(self):
+        self.assertEqual(
+            _get_bulk_batch_size([]),
+            199
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite limits')
+    def test_many_objects(self):
+        objs = [
+            Translation(
+                content_type_id=1,
+                object_id=str(i),
+                field='name',
+                language='de',
+                text='text',
+            ) for i in range(5000)
+        ]
+
+        self.assertEqual(
+            _get_bulk_batch_size(objs),
+            199
+        )
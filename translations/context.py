@@ -1,24 +1,29 @@
 """This module contains the context managers for the Translations app."""
 
-from django.db import models
+from django.db import transaction
+from django.db.models.query_utils import DeferredAttribute
 
 import translations.models
 from translations.languages import _get_default_language, \
     _get_translate_language
 from translations.utils import _get_relations_hierarchy, _get_purview, \
-    _get_translations
+    _get_batched_queries, _get_translations, _get_fields_getter, \
+    _get_bulk_batch_size, _get_translations_database
 
 
 __docformat__ = 'restructuredtext'
 
 
+_ITERATOR_CHUNK_SIZE = 2000
+
+
 class Context:
     """A context manager which provides custom translation functionalities."""
 
     def __init__(self, entity, *relations):
         """Initialize a `Context` with an entity and some relations of it."""
         hierarchy = _get_relations_hierarchy(*relations)
-        self.mapping, self.query = _get_purview(entity, hierarchy)
+        self.mapping = _get_purview(entity, hierarchy)
 
     def __enter__(self):
         return self
@@ -26,16 +31,29 @@ class Context:
     def __exit__(self, exc_type, exc_value, traceback):
         pass
 
+    def _get_queries(self, write=False):
+        r"""
+        Return the queries of the translations of the `Context`\ 's `purview`.
+        """
+        # big purviews are queried in batches to respect the backend limits
+        return _get_batched_queries([
+            ({'content_type_id': ct_id}, list(objs))
+            for (ct_id, objs) in self.mapping.items()
+        ], write=write)
+
     def _get_changed_fields(self):
         r"""
         Yield the info about the changed fields in the `Context`\ 's `purview`.
         """
         for (ct_id, objs) in self.mapping.items():
+            model = type(next(iter(objs.values())))
+            fields = model._get_translatable_fields_names()
+            getter = _get_fields_getter(fields)
             for (obj_id, obj) in objs.items():
-                for field in type(obj)._get_translatable_fields_names():
-                    text = getattr(obj, field, None)
-                    default = obj._default_translatable_fields.get(field, None)
-                    if text and text != default:
+                defaults = obj._default_translatable_fields
+                for (field, text) in zip(fields, getter(obj)):
+                    default = defaults.get(field, None)
+                    if text is not None and text != default:
                         yield ({
                             'content_type_id': ct_id,
                             'object_id': obj_id,
@@ -51,9 +69,12 @@ class Context:
             _translations = [
                 translations.models.Translation(
                     language=lang, text=text, **address
-                ) for address, text in self._get_changed_fields()
+                ) for address, text in self._get_changed_fields() if text
             ]
-            translations.models.Translation.objects.bulk_create(_translations)
+            translations.models.Translation.objects.bulk_create(
+                _translations,
+                batch_size=_get_bulk_batch_size(_translations),
+            )
 
     def read(self, lang=None):
         r"""
@@ -61,15 +82,38 @@ class Context:
         """
         lang = _get_translate_language(lang)
         if lang != _get_default_language():
-            _translations = _get_translations(self.query, lang)
-            for translation in _translations:
-                ct_id = translation.content_type.id
-                obj_id = translation.object_id
-                field = translation.field
-                text = translation.text
-                obj = self.mapping[ct_id][obj_id]
-                if field in type(obj)._get_translatable_fields_names():
-                    setattr(obj, field, text)
+            fields = {}
+            for (ct_id, objs) in self.mapping.items():
+                model = type(next(iter(objs.values())))
+                names = model._get_translatable_fields_names_set()
+                # the values of the fields without a custom descriptor live
+                # in the instance dict, the others are set through their
+                # descriptors
+                plain = frozenset(
+                    name for name in names
+                    if type(getattr(model, name, None)) is DeferredAttribute
+                )
+                fields[ct_id] = (plain, names - plain)
+            # index the objects once for all the rows
+            objects = {
+                (ct_id, obj_id): obj
+                for (ct_id, objs) in self.mapping.items()
+                for (obj_id, obj) in objs.items()
+            }
+            for query in self._get_queries():
+                # plain rows are enough, no need to instantiate the models
+                _translations = _get_translations(query, lang).values_list(
+                    'content_type', 'object_id', 'field', 'text',
+                )
+                # stream the rows instead of caching them all in memory
+                for (ct_id, obj_id, field, text) in _translations.iterator(
+                    chunk_size=_ITERATOR_CHUNK_SIZE,
+                ):
+                    plain, others = fields[ct_id]
+                    if field in plain:
+                        objects[(ct_id, obj_id)].__dict__[field] = text
+                    elif field in others:
+                        setattr(objects[(ct_id, obj_id)], field, text)
         else:
             self.reset()
 
@@ -79,17 +123,38 @@ class Context:
         """
         lang = _get_translate_language(lang)
         if lang != _get_default_language():
-            query = models.Q()
+            objects = {}
             _translations = []
             for address, text in self._get_changed_fields():
-                query |= models.Q(**address)
-                _translations.append(
-                    translations.models.Translation(
-                        language=lang, text=text, **address
+                objects.setdefault(
+                    (address['content_type_id'], address['field']), []
+                ).append(address['object_id'])
+                # cleared fields only lose their translations
+                if text:
+                    _translations.append(
+                        translations.models.Translation(
+                            language=lang, text=text, **address
+                        )
+                    )
+            # one lookup per content type and field instead of one per
+            # translation
+            queries = _get_batched_queries([
+                ({'content_type_id': ct_id, 'field': field}, obj_ids)
+                for ((ct_id, field), obj_ids) in objects.items()
+            ], write=True)
+            # replace the translations in one unit of work, so there is no
+            # moment in which they are missing
+            if queries:
+                with transaction.atomic(
+                    using=_get_translations_database(write=True),
+                    savepoint=False,
+                ):
+                    for query in queries:
+                        _get_translations(query, lang).delete()
+                    translations.models.Translation.objects.bulk_create(
+                        _translations,
+                        batch_size=_get_bulk_batch_size(_translations),
                     )
-                )
-            _get_translations(query, lang).delete()
-            translations.models.Translation.objects.bulk_create(_translations)
 
     def delete(self, lang=None):
         r"""
@@ -97,7 +162,14 @@ class Context:
         """
         lang = _get_translate_language(lang)
         if lang != _get_default_language():
-            _get_translations(self.query, lang).delete()
+            queries = self._get_queries(write=True)
+            if queries:
+                with transaction.atomic(
+                    using=_get_translations_database(write=True),
+                    savepoint=False,
+                ):
+                    for query in queries:
+                        _get_translations(query, lang).delete()
 
     def reset(self):
         r"""
@@ -10,6 +10,7 @@ __docformat__ = 'restructuredtext'
 _supported_code = {}
 
 _all_codes = None
+_all_codes_set = None
 _all_choices = None
 
 _translation_codes = {}
@@ -19,28 +20,17 @@ _translation_choices = {}
 def _get_supported_language(lang):
     """Return the `supported language` code of a custom language code."""
     if lang not in _supported_code:
-        code = lang.split('-')[0]
-
-        lang_exists = False
-        code_exists = False
-
-        # break when the lang is found but not when the code is found
-        # cause the code might come before lang and we may miss an accent
-        for choice in settings.LANGUAGES:
-            if lang == choice[0]:
-                lang_exists = True
-                break
-            if code == choice[0]:
-                code_exists = True
-
-        if lang_exists:
+        codes = _get_all_languages_set()
+        if lang in codes:
             _supported_code[lang] = lang
-        elif code_exists:
-            _supported_code[lang] = code
         else:
-            raise ValueError(
-                '`{}` is not a supported language.'.format(lang)
-            )
+            code = lang.split('-', 1)[0]
+            if code in codes:
+                _supported_code[lang] = code
+            else:
+                raise ValueError(
+                    '`{}` is not a supported language.'.format(lang)
+                )
     return _supported_code[lang]
 
 
@@ -62,6 +52,14 @@ def _get_all_languages():
     return _all_codes
 
 
+def _get_all_languages_set():
+    """Return all the `supported language` codes as a set."""
+    global _all_codes_set
+    if _all_codes_set is None:
+        _all_codes_set = frozenset(_get_all_languages())
+    return _all_codes_set
+
+
 def _get_all_choices():
     """Return all the `supported language` choices."""
     global _all_choices
@@ -115,6 +115,15 @@ class Translatable(models.Model):
             ]
         return cls._cached_translatable_fields_names
 
+    @classmethod
+    def _get_translatable_fields_names_set(cls):
+        """Return the set of the names of the model's translatable fields."""
+        if not hasattr(cls, '_cached_translatable_fields_names_set'):
+            cls._cached_translatable_fields_names_set = frozenset(
+                cls._get_translatable_fields_names()
+            )
+        return cls._cached_translatable_fields_names_set
+
     @classmethod
     def _get_translatable_fields_choices(cls):
         """Return the choices of the model's translatable fields."""
@@ -51,9 +51,11 @@ class TranslatableQuerySet(query.QuerySet):
             )
 
         if not self._trans_cache:
-            with Context(self._result_cache, *self._trans_rels) \
-                    as context:
-                context.read(self._trans_lang)
+            # nothing to translate in an empty result
+            if self._result_cache:
+                with Context(self._result_cache, *self._trans_rels) \
+                        as context:
+                    context.read(self._trans_lang)
             self._trans_cache = True
 
     def translate(self, lang=None):
@@ -1,8 +1,15 @@
 """This module contains the utilities for the Translations app."""
 
-from django.db import models
+import collections.abc
+import functools
+import operator
+
+from django.db import models, connections, router
 from django.db.models.query import prefetch_related_objects
 from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields.related_descriptors import \
+    ForwardManyToOneDescriptor, ReverseOneToOneDescriptor, \
+    ReverseManyToOneDescriptor
 from django.core.exceptions import FieldError
 from django.contrib.contenttypes.models import ContentType
 from django.utils.functional import SimpleLazyObject
@@ -13,42 +20,34 @@ import translations.models
 __docformat__ = 'restructuredtext'
 
 
+_BULK_BATCH_SIZE = 1000
+
+
+@functools.lru_cache(maxsize=1024)
 def _get_reverse_relation(model, relation):
     """Return the reverse of a model's relation."""
-    parts = relation.split(LOOKUP_SEP)
-    root = parts[0]
-    branch = parts[1:]
-
-    field = model._meta.get_field(root)
-    reverse_relation = field.remote_field.name
-
-    if branch:
-        branch_model = field.related_model
-        branch_relation = LOOKUP_SEP.join(branch)
-        branch_reverse_relation = _get_reverse_relation(
-            branch_model,
-            branch_relation
-        )
-        return '{}__{}'.format(
-            branch_reverse_relation,
-            reverse_relation,
-        )
-    else:
-        return reverse_relation
+    reverse_relations = []
 
+    for part in relation.split(LOOKUP_SEP):
+        field = model._meta.get_field(part)
+        reverse_relations.append(field.remote_field.name)
+        model = field.related_model
+
+    return LOOKUP_SEP.join(reversed(reverse_relations))
 
-def _get_dissected_lookup(model, lookup):
-    """Return the dissected info of a lookup."""
-    dissected = {
-        'relation': [],
-        'field': '',
-        'supplement': '',
-        'translatable': False,
-    }
 
-    def _fill_dissected(model, *relation_parts):
-        root = relation_parts[0]
-        nest = relation_parts[1:]
+@functools.lru_cache(maxsize=1024)
+def _get_lookup_parts(model, lookup):
+    """Return the relation, field and supplement parts of a lookup."""
+    relation = []
+    field_name = ''
+    field_model = None
+    supplement = ''
+
+    parts = lookup.split(LOOKUP_SEP)
+
+    for (index, root) in enumerate(parts):
+        nest = parts[index + 1:]
 
         try:
             if root == 'pk':
@@ -56,58 +55,81 @@ def _get_dissected_lookup(model, lookup):
             else:
                 field = model._meta.get_field(root)
         except Exception as e:
-            if not dissected['relation'] or nest or dissected['field']:
+            if not relation or nest or field_name:
                 raise e
-            dissected['supplement'] = root
+            supplement = root
+            break
         else:
-            field_model = field.related_model
-            if field_model:
-                dissected['relation'].append(root)
-                if nest:
-                    _fill_dissected(field_model, *nest)
+            if field.related_model:
+                relation.append(root)
+                model = field.related_model
             else:
-                dissected['field'] = root
-                if issubclass(model, translations.models.Translatable):
-                    if root in model._get_translatable_fields_names():
-                        dissected['translatable'] = True
+                field_name = root
+                field_model = model
                 if nest:
                     if len(nest) == 1:
-                        dissected['supplement'] = nest[0]
+                        supplement = nest[0]
                     else:
                         raise FieldError("Unsupported lookup '{}'".format(
                             nest[0])
                         )
+                break
 
-    parts = lookup.split(LOOKUP_SEP)
+    return (tuple(relation), field_name, field_model, supplement)
 
-    _fill_dissected(model, *parts)
 
-    return dissected
+def _get_dissected_lookup(model, lookup):
+    """Return the dissected info of a lookup."""
+    relation, field, field_model, supplement = _get_lookup_parts(
+        model, lookup
+    )
+
+    # the translatable fields of a model may change, so they are checked on
+    # every call instead of being cached with the parts
+    translatable = bool(field_model) and issubclass(
+        field_model, translations.models.Translatable
+    ) and field in field_model._get_translatable_fields_names_set()
+
+    return {
+        'relation': list(relation),
+        'field': field,
+        'supplement': supplement,
+        'translatable': translatable,
+    }
 
 
+@functools.lru_cache(maxsize=256)
 def _get_relations_hierarchy(*relations):
     """Return the relations hierarchy of some relations."""
     hierarchy = {}
 
-    def _fill_hierarchy(hierarchy, *relation_parts):
-        root = relation_parts[0]
-        nest = relation_parts[1:]
+    for relation in relations:
+        parts = relation.split(LOOKUP_SEP)
+
+        level = hierarchy
+        for part in parts[:-1]:
+            level = level.setdefault(part, {
+                'included': False,
+                'relations': {},
+            })['relations']
 
-        hierarchy.setdefault(root, {
+        level.setdefault(parts[-1], {
             'included': False,
             'relations': {},
-        })
+        })['included'] = True
 
-        if nest:
-            _fill_hierarchy(hierarchy[root]['relations'], *nest)
-        else:
-            hierarchy[root]['included'] = True
+    return hierarchy
 
-    for relation in relations:
-        parts = relation.split(LOOKUP_SEP)
-        _fill_hierarchy(hierarchy, *parts)
 
-    return hierarchy
+def _get_fields_getter(fields):
+    """Return a getter of the values of some fields of an object."""
+    if not fields:
+        return lambda obj: ()
+    elif len(fields) == 1:
+        field = fields[0]
+        return lambda obj: (getattr(obj, field),)
+    else:
+        return operator.attrgetter(*fields)
 
 
 def _get_entity_details(entity):
@@ -125,13 +147,17 @@ def _get_entity_details(entity):
         model = type(entity)
         iterable = False
     elif hasattr(entity, '__iter__'):
-        if len(entity) > 0:
-            if isinstance(entity[0], models.Model):
-                model = type(entity[0])
+        # probe the first object only, querysets get evaluated once and
+        # keep their result cache for the later iterations
+        try:
+            first = next(iter(entity))
+        except StopIteration:
+            model = None
+        else:
+            if isinstance(first, models.Model):
+                model = type(first)
             else:
                 raise TypeError(error_message)
-        else:
-            model = None
         iterable = True
     else:
         raise TypeError(error_message)
@@ -142,63 +168,142 @@ def _get_entity_details(entity):
 def _get_purview(entity, hierarchy):
     """Return the purview of an entity and a relations hierarchy of it."""
     mapping = {}
-    query = models.Q()
 
-    def _fill_entity(entity, hierarchy, included=True):
+    # the content type id and translatable fields of the visited models
+    details = {}
+
+    # walk the hierarchy level by level, all the objects of a relation in a
+    # level are processed together
+    queue = collections.deque([(entity, hierarchy, True)])
+
+    while queue:
+        entity, hierarchy, included = queue.popleft()
+
+        # one-shot iterators can't be probed and iterated again
+        if isinstance(entity, collections.abc.Iterator):
+            entity = list(entity)
+
         iterable, model = _get_entity_details(entity)
 
         if model is None:
-            return
+            continue
 
-        content_type_id = ContentType.objects.get_for_model(model).id
+        objs = entity if iterable else [entity]
 
         if included:
+            if model not in details:
+                if not issubclass(model, translations.models.Translatable):
+                    raise TypeError('`{}` is not Translatable!'.format(model))
+                fields = model._get_translatable_fields_names()
+                details[model] = (
+                    ContentType.objects.get_for_model(model).id,
+                    fields,
+                    _get_fields_getter(fields),
+                )
+            content_type_id, fields, getter = details[model]
+
             instances = mapping.setdefault(content_type_id, {})
-            if not issubclass(model, translations.models.Translatable):
-                raise TypeError('`{}` is not Translatable!'.format(model))
 
-        def _fill_obj(obj):
-            if included:
+            for obj in objs:
                 if not hasattr(obj, '_default_translatable_fields'):
-                    obj._default_translatable_fields = {
-                        field: getattr(obj, field) for field in
-                        type(obj)._get_translatable_fields_names()
-                    }
+                    obj._default_translatable_fields = dict(
+                        zip(fields, getter(obj))
+                    )
                 object_id = str(obj.pk)
                 instances[object_id] = obj
-                nonlocal query
-                query |= models.Q(
-                    content_type__id=content_type_id,
-                    object_id=object_id,
-                )
 
-            if hierarchy:
-                for (relation, detail) in hierarchy.items():
+        for (relation, detail) in hierarchy.items():
+            # the kind of a relation is the same for all the objects
+            descriptor = getattr(model, relation, None)
+            many = isinstance(descriptor, ReverseManyToOneDescriptor)
+
+            # prefetch the relation of all the objects at once
+            if many:
+                unprefetched = [
+                    obj for obj in objs if not (
+                        hasattr(obj, '_prefetched_objects_cache') and
+                        relation in obj._prefetched_objects_cache
+                    )
+                ]
+            elif isinstance(
+                descriptor,
+                (ForwardManyToOneDescriptor, ReverseOneToOneDescriptor),
+            ):
+                unprefetched = [
+                    obj for obj in objs if not descriptor.is_cached(obj)
+                ]
+            else:
+                unprefetched = []
+            if unprefetched:
+                prefetch_related_objects(unprefetched, relation)
+
+            nested = (detail['relations'], detail['included'])
+
+            if many:
+                values = []
+                for obj in objs:
+                    values.extend(getattr(obj, relation).all())
+                queue.append((values,) + nested)
+            else:
+                # other attributes (e.g. properties) may give the objects of
+                # different models, or whole iterables of objects
+                groups = {}
+                for obj in objs:
                     value = getattr(obj, relation, None)
 
                     if value is not None:
                         if isinstance(value, models.Manager):
-                            if not (
-                                hasattr(obj, '_prefetched_objects_cache') and
-                                relation in obj._prefetched_objects_cache
-                            ):
-                                prefetch_related_objects([obj], relation)
                             value = value.all()
-                        _fill_entity(
-                            entity=value,
-                            hierarchy=detail['relations'],
-                            included=detail['included'],
-                        )
+                        if isinstance(value, models.Model):
+                            groups.setdefault(type(value), []).append(value)
+                        else:
+                            queue.append((value,) + nested)
+                for values in groups.values():
+                    queue.append((values,) + nested)
+
+    return mapping
 
-        if iterable:
-            for obj in entity:
-                _fill_obj(obj)
-        else:
-            _fill_obj(entity)
 
-    _fill_entity(entity, hierarchy)
+def _get_translations_database(write=False):
+    """Return the database alias of the `Translation` queries."""
+    model = translations.models.Translation
+    if write:
+        return router.db_for_write(model)
+    else:
+        return router.db_for_read(model)
+
 
-    return mapping, query
+def _get_batched_queries(groups, write=False):
+    """Return the queries of some groups of object ids in batches."""
+    connection = connections[_get_translations_database(write=write)]
+    # leave room for the language parameter
+    size = min(
+        connection.features.max_query_params or _BULK_BATCH_SIZE,
+        _BULK_BATCH_SIZE,
+    ) - 1
+
+    queries = []
+    query = models.Q()
+    params = 0
+
+    for (lookups, object_ids) in groups:
+        start = 0
+        while start < len(object_ids):
+            room = size - params - len(lookups)
+            if room <= 0:
+                queries.append(query)
+                query = models.Q()
+                params = 0
+                room = size - len(lookups)
+            chunk = object_ids[start:start + room]
+            query |= models.Q(object_id__in=chunk, **lookups)
+            params += len(lookups) + len(chunk)
+            start += len(chunk)
+
+    if query:
+        queries.append(query)
+
+    return queries
 
 
 def _get_translations(query, lang):
@@ -208,8 +313,23 @@ def _get_translations(query, lang):
             language=lang,
         ).filter(
             query,
-        ).select_related('content_type')
+        )
 
         return queryset
     else:
         return translations.models.Translation.objects.none()
+
+
+def _get_bulk_batch_size(objs):
+    """Return the batch size to bulk create some `Translation` objects with."""
+    model = translations.models.Translation
+    connection = connections[_get_translations_database(write=True)]
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not isinstance(field, models.AutoField)
+    ]
+    # respect the backend limits (e.g. the SQLite query parameters limit)
+    return min(
+        _BULK_BATCH_SIZE,
+        max(connection.ops.bulk_batch_size(fields, objs), 1),
+    )